@@ -1,26 +1,23 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
 import json
 import os
+import base64
+import time
+import threading
 from datetime import datetime
+import numpy as np
+import pandas as pd
 
 from database.db_manager import DatabaseManager
-from services.ml_service import MLService
-from services.nlp_service import NLPService
+from services.ml_service import MLService, UP_TO_DATE
 from utils.file_handler import FileHandler
 
-# Optional chatbot import
-try:
-    from services.chatbot_service import ChatbotService
-    CHATBOT_AVAILABLE = True
-except ImportError:
-    CHATBOT_AVAILABLE = False
-    ChatbotService = None
-
 app = FastAPI(title="ACTMS API", description="Anti-Corruption Tender Management System API")
 
 # Configure CORS
@@ -35,10 +32,33 @@ app.add_middleware(
 # Initialize services
 db = DatabaseManager()
 ml_service = MLService()
-nlp_service = NLPService()
-chatbot_service = ChatbotService() if CHATBOT_AVAILABLE else None
 file_handler = FileHandler()
 
+# The NLP (spaCy) and chatbot (Gemini) services are slow to import and set up,
+# so they are created on first use instead of at startup
+_lazy_services = {}
+_lazy_services_lock = threading.Lock()
+
+def get_nlp_service():
+    """Get the NLP service, creating it on first use"""
+    with _lazy_services_lock:
+        if "nlp" not in _lazy_services:
+            from services.nlp_service import NLPService
+            _lazy_services["nlp"] = NLPService()
+        return _lazy_services["nlp"]
+
+def get_chatbot_service():
+    """Get the chatbot service, creating it on first use; None if it is unavailable"""
+    with _lazy_services_lock:
+        if "chatbot" not in _lazy_services:
+            # Optional chatbot import
+            try:
+                from services.chatbot_service import ChatbotService
+                _lazy_services["chatbot"] = ChatbotService()
+            except ImportError:
+                _lazy_services["chatbot"] = None
+        return _lazy_services["chatbot"]
+
 # Pydantic models for request/response
 class BidCreate(BaseModel):
     tender_id: int
@@ -56,6 +76,362 @@ class DashboardResponse(BaseModel):
     total_bids: int
     total_alerts: int
 
+# Short-lived caches for data the dashboard endpoints read repeatedly. Endpoints
+# that write through the API invalidate them; the TTL covers outside writers.
+COUNTS_CACHE_TTL = 15  # seconds
+DATA_CACHE_TTL = 60  # seconds
+_data_cache = {}
+# Bumped on every API write; entries are only valid for the version they were loaded under
+_data_version = 0
+
+def cached_load(key, loader, ttl):
+    """Return loader()'s result, reusing a value loaded less than ttl seconds ago"""
+    now = time.monotonic()
+    entry = _data_cache.get(key)
+    if entry is None or entry[1] != _data_version or now - entry[0] > ttl:
+        version = _data_version
+        entry = (now, version, loader())
+        # A write during the load makes the result stale; return it but don't keep it
+        if version == _data_version:
+            _data_cache[key] = entry
+    return entry[2]
+
+def get_system_counts():
+    """Get (active tenders, bids, active alerts), reusing a recent result when possible"""
+    return cached_load("counts", db.get_system_counts, COUNTS_CACHE_TTL)
+
+def get_table_counts():
+    """Get the row count of every data table, reusing a recent result when possible"""
+    return cached_load("table_counts", db.counts, COUNTS_CACHE_TTL)
+
+def load_tenders():
+    """Get all tenders, cached; callers must not modify the returned DataFrame"""
+    return cached_load("tenders", db.get_tenders, DATA_CACHE_TTL)
+
+def load_bids():
+    """Get all bids, cached; callers must not modify the returned DataFrame"""
+    return cached_load("bids", db.get_bids, DATA_CACHE_TTL)
+
+def load_alerts():
+    """Get active alerts, cached; callers must not modify the returned DataFrame"""
+    return cached_load("alerts", db.get_ai_alerts, DATA_CACHE_TTL)
+
+def load_bid_details():
+    """Get bids joined with their tender's estimate and creation time, cached"""
+    return cached_load("bid_details", build_bid_details, DATA_CACHE_TTL)
+
+def build_bid_details():
+    """Merge bids with tender columns once and derive the per-bid ratios from it"""
+    tender_columns = load_tenders()[['id', 'estimated_value', 'created_at']].rename(
+        columns={'id': 'tender_id', 'created_at': 'tender_created_at'}
+    )
+    merged = load_bids().merge(tender_columns, on='tender_id', how='left')
+    merged['bid_ratio'] = (merged['bid_amount'] / merged['estimated_value']).replace([np.inf, -np.inf], np.nan)
+    merged['response_hours'] = (merged['submitted_at'] - merged['tender_created_at']).dt.total_seconds() / 3600
+    return merged
+
+def load_bid_histogram(field, bins):
+    """Get a bid field's binned counts, cached per field at the default bin count only"""
+    def build():
+        # Derived fields come from the shared bid-tender merge
+        bids_df = load_bid_details() if field in ("bid_ratio", "response_hours") else load_bids()
+        return fast_hist(bids_df[field], bins)
+    # bins comes from the query string, so a cache entry per value would grow without bound
+    if bins != HISTOGRAM_BINS:
+        return build()
+    return cached_load(("histogram", field), build, DATA_CACHE_TTL)
+
+def load_aggregates():
+    """Get the aggregates shared by dashboard charts, computed once per cache window"""
+    return cached_load("aggregates", compute_aggregates, DATA_CACHE_TTL)
+
+def compute_aggregates():
+    """Compute tender and bid summaries in one pass over the cached DataFrames"""
+    tenders_df = load_tenders()
+    bids_df = load_bids()
+    
+    status_counts = tenders_df['status'].value_counts()
+    department_stats = tenders_df.groupby('department', observed=True)['estimated_value'].agg(['count', 'mean', 'sum'])
+    
+    company_risk = company_risk_table(bids_df)
+    company_risk = company_risk[company_risk['suspicious_bids'] > 0].nlargest(10, 'suspicious_bids')
+    
+    total_bids = len(bids_df)
+    suspicious_bids = int(bids_df['is_suspicious'].sum())
+    avg_anomaly_score = float(bids_df['anomaly_score'].fillna(0).mean()) if total_bids else 0.0
+    
+    return {
+        "tender_status_counts": {str(status): int(count) for status, count in status_counts.items()},
+        "department_stats": department_stats.reset_index().to_dict('records'),
+        "company_risk": company_risk.reset_index().to_dict('records'),
+        "bids": {
+            "total": total_bids,
+            "suspicious": suspicious_bids,
+            "normal": total_bids - suspicious_bids,
+            "avg_anomaly_score": avg_anomaly_score
+        }
+    }
+
+# Above this many bids the per-company totals use bincount over category codes
+LARGE_GROUPBY_ROWS = 50_000
+
+def company_risk_table(bids_df):
+    """Get each company's bid count, suspicious bid count and mean anomaly score"""
+    if len(bids_df) <= LARGE_GROUPBY_ROWS:
+        # One named aggregation per company; observed=True skips unused categories
+        return bids_df.groupby('company_name', observed=True).agg(
+            total_bids=('id', 'count'),
+            suspicious_bids=('is_suspicious', 'sum'),
+            avg_anomaly_score=('anomaly_score', 'mean')
+        )
+    
+    companies = bids_df['company_name'].cat
+    codes = companies.codes.to_numpy()
+    known = codes >= 0
+    codes = codes[known]
+    n_companies = len(companies.categories)
+    
+    scores = bids_df['anomaly_score'].to_numpy()[known]
+    scored = ~np.isnan(scores)
+    total_bids = np.bincount(codes, minlength=n_companies)
+    suspicious_bids = np.bincount(codes, weights=bids_df['is_suspicious'].to_numpy(dtype=float)[known], minlength=n_companies)
+    score_sums = np.bincount(codes[scored], weights=scores[scored], minlength=n_companies)
+    score_counts = np.bincount(codes[scored], minlength=n_companies)
+    with np.errstate(invalid='ignore'):
+        avg_anomaly_score = score_sums / score_counts
+    
+    table = pd.DataFrame(
+        {
+            'total_bids': total_bids,
+            'suspicious_bids': suspicious_bids.astype(np.int64),
+            'avg_anomaly_score': avg_anomaly_score
+        },
+        index=pd.CategoricalIndex(companies.categories, dtype=bids_df['company_name'].dtype, name='company_name')
+    )
+    return table[total_bids > 0]
+
+# Pattern rates are not meaningful on a handful of bids
+PATTERN_MIN_BIDS = 10
+
+def load_bidding_patterns():
+    """Get bidding pattern indicators, computed once per cache window"""
+    return cached_load("patterns", compute_bidding_patterns, DATA_CACHE_TTL)
+
+def compute_bidding_patterns():
+    """Compute the share of bids showing patterns associated with collusion or manipulation"""
+    bids_df = load_bids()
+    total_bids = len(bids_df)
+    if total_bids < PATTERN_MIN_BIDS:
+        # Skip the work entirely; the rates would not be reported anyway
+        return {"total_bids": total_bids, "sufficient_data": False}
+    
+    submitted_at = bids_df['submitted_at'].dt
+    hour = submitted_at.hour.to_numpy()
+    weekday = submitted_at.weekday.to_numpy()
+    after_hours_rate = ((hour < 8) | (hour > 18)).mean() * 100
+    weekend_rate = (weekday >= 5).mean() * 100
+    
+    # Whole-cent int64 amounts make the round-thousand check an exact integer modulo
+    cents = np.rint(bids_df['bid_amount'].to_numpy() * 100).astype(np.int64)
+    round_number_rate = (cents % 100_000 == 0).mean() * 100
+    
+    return {
+        "total_bids": total_bids,
+        "sufficient_data": True,
+        "after_hours_rate": round(float(after_hours_rate), 1),
+        "weekend_rate": round(float(weekend_rate), 1),
+        "round_number_rate": round(float(round_number_rate), 1)
+    }
+
+def invalidate_cached_data():
+    """Drop cached counts and DataFrames after a write so the next read is fresh"""
+    global _data_version
+    _data_version += 1
+    _data_cache.clear()
+
+# Outliers sent per box plot group; the rest are only counted
+BOX_OUTLIER_LIMIT = 20
+
+def fast_hist(series, nbins=20):
+    """Pre-bin a numeric series so the browser only receives bin edges and counts"""
+    values = series.dropna().to_numpy(dtype=float)
+    if values.size == 0:
+        return {"edges": [], "counts": []}
+    
+    counts, edges = np.histogram(values, bins=nbins)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+def boxstats(values, max_outliers=BOX_OUTLIER_LIMIT):
+    """Precompute box plot statistics so only quartiles, fences and the most extreme outliers are sent"""
+    values = np.asarray(values, dtype=float)
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    lo = q1 - 1.5 * iqr
+    hi = q3 + 1.5 * iqr
+    outliers = values[(values < lo) | (values > hi)]
+    outlier_count = outliers.size
+    if outlier_count > max_outliers:
+        # Keep the outliers furthest beyond their fence
+        distance = np.maximum(lo - outliers, outliers - hi)
+        outliers = outliers[np.argpartition(distance, -max_outliers)[-max_outliers:]]
+    outliers.sort()
+    return {
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "lowerfence": float(max(lo, values.min())),
+        "upperfence": float(min(hi, values.max())),
+        "outliers": outliers.tolist(),
+        "outlier_count": int(outlier_count),
+        "count": int(values.size)
+    }
+
+# Above this many points the scatter is sent as grid cell counts instead of raw points
+SCATTER_POINT_LIMIT = 20_000
+SCATTER_GRID = (60, 40)
+TIMELINE_POINT_LIMIT = 1_000
+HISTOGRAM_BINS = 20
+HISTOGRAM_MAX_BINS = 200
+BID_CHUNK_SIZE = 50_000
+PROGRESS_EVERY_CHUNKS = 2
+
+def lttb(x, y, n_out):
+    """Downsample an x-sorted series to n_out points with Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+    
+    # The first and last points are kept; the rest fall into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        keep[i + 1] = selected
+    return x[keep], y[keep]
+
+def grid_edges(values, nbins):
+    """Evenly spaced bin edges covering values, widened if they are all equal"""
+    lo, hi = float(values.min()), float(values.max())
+    if hi <= lo:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, nbins + 1)
+
+def typed_array(values, dtype):
+    """Encode a numeric array as base64 little-endian bytes, decoded into a typed array by the browser"""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    data = np.ascontiguousarray(values, dtype=dtype)
+    return {"dtype": dtype.str[1:], "bdata": base64.b64encode(data.tobytes()).decode('ascii')}
+
+def bin_points(x, y, x_edges, y_edges):
+    """Count points per grid cell, returning the centres and counts of non-empty cells"""
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    xi, yi = np.nonzero(counts)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+    return {
+        "x": x_centres[xi].tolist(),
+        "y": y_centres[yi].tolist(),
+        "count": counts[xi, yi].astype(int).tolist()
+    }
+
+def load_bid_boxstats():
+    """Get bid amount box plot statistics, computed once per cache window"""
+    return cached_load("bid_boxstats", compute_bid_boxstats, DATA_CACHE_TTL)
+
+def compute_bid_boxstats():
+    """Compute bid amount box plot statistics for normal and suspicious bids"""
+    bids_df = load_bids()
+    amounts = bids_df['bid_amount'].to_numpy()
+    suspicious = bids_df['is_suspicious'].to_numpy()
+    
+    groups = {}
+    for name, mask in (("normal", ~suspicious), ("suspicious", suspicious)):
+        if mask.any():
+            groups[name] = boxstats(amounts[mask])
+    return groups
+
+def load_score_timeline(points):
+    """Get the downsampled anomaly score timeline, cached only at the default point count"""
+    # points comes from the query string, so a cache entry per value would grow without bound
+    if points != TIMELINE_POINT_LIMIT:
+        return compute_score_timeline(points)
+    return cached_load("score_timeline", lambda: compute_score_timeline(points), DATA_CACHE_TTL)
+
+def compute_score_timeline(points):
+    """Compute anomaly scores over submission time, LTTB-downsampled per series"""
+    bids_df = load_bids()
+    # Bids are cached newest first; reversing gives the ascending x the downsampler needs
+    times = bids_df['submitted_at'].to_numpy(dtype='datetime64[ms]')[::-1]
+    scores = bids_df['anomaly_score'].to_numpy(dtype=float)[::-1]
+    suspicious = bids_df['is_suspicious'].to_numpy()[::-1]
+    
+    plotted = ~np.isnan(scores) & ~np.isnat(times)
+    epoch_ms = times.astype(np.int64).astype(float)
+    
+    series = {}
+    for name, in_series in (("normal", plotted & ~suspicious), ("suspicious", plotted & suspicious)):
+        x, y = lttb(epoch_ms[in_series], scores[in_series], points)
+        series[name] = {"x": typed_array(x, 'f8'), "y": typed_array(y, 'f4')}
+    return series
+
+def load_bid_scatter():
+    """Get the bid amount vs anomaly score scatter data, computed once per cache window"""
+    return cached_load("bid_scatter", compute_bid_scatter, DATA_CACHE_TTL)
+
+def compute_bid_scatter():
+    """Compute bid amount vs anomaly score points, clipped to the 1-99 percentile bid range"""
+    # Work on the three plotted columns as arrays; filtering the frame would copy every column
+    bids_df = load_bids()
+    scores = bids_df['anomaly_score'].to_numpy()
+    scored = ~np.isnan(scores)
+    amounts = bids_df['bid_amount'].to_numpy()[scored]
+    scores = scores[scored]
+    suspicious = bids_df['is_suspicious'].to_numpy()[scored]
+    if amounts.size == 0:
+        return {
+            "bid_amount": typed_array(amounts, 'f8'),
+            "anomaly_score": typed_array(scores, 'f4'),
+            "is_suspicious": typed_array(suspicious, 'u1'),
+            "hidden_outliers": 0
+        }
+    
+    lo, hi = np.quantile(amounts, [0.01, 0.99])
+    in_range = (amounts >= lo) & (amounts <= hi)
+    hidden_outliers = int(np.count_nonzero(~in_range))
+    amounts, scores, suspicious = amounts[in_range], scores[in_range], suspicious[in_range]
+    
+    if amounts.size > SCATTER_POINT_LIMIT:
+        x_edges = grid_edges(amounts, SCATTER_GRID[0])
+        y_edges = grid_edges(scores, SCATTER_GRID[1])
+        return {
+            "binned": True,
+            "normal": bin_points(amounts[~suspicious], scores[~suspicious], x_edges, y_edges),
+            "suspicious": bin_points(amounts[suspicious], scores[suspicious], x_edges, y_edges),
+            "hidden_outliers": hidden_outliers
+        }
+    
+    # Bids are cached newest first; the chart reads unparsed points as sorted by x
+    order = np.argsort(amounts, kind='stable')
+    amounts, scores, suspicious = amounts[order], scores[order], suspicious[order]
+    return {
+        "bid_amount": typed_array(amounts, 'f8'),
+        "anomaly_score": typed_array(scores, 'f4'),
+        "is_suspicious": typed_array(suspicious, 'u1'),
+        "hidden_outliers": hidden_outliers
+    }
+
 # Create static directory if it doesn't exist
 os.makedirs("static", exist_ok=True)
 
@@ -78,10 +454,8 @@ async def health_check():
 async def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
-        total_tenders = db.get_tender_count()
+        total_tenders, total_bids, total_alerts = get_system_counts()
         active_tenders = total_tenders  # All tenders are active by default
-        total_bids = db.get_bid_count()
-        total_alerts = db.get_alert_count()
         
         return DashboardResponse(
             total_tenders=total_tenders,
@@ -96,7 +470,7 @@ async def get_dashboard_stats():
 async def get_tenders(status: Optional[str] = None):
     """Get all tenders or filtered by status"""
     try:
-        tenders_df = db.get_tenders(status)
+        tenders_df = load_tenders() if status is None else db.get_tenders(status)
         return tenders_df.to_dict('records')
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -120,7 +494,7 @@ async def create_tender(
             file_path = file_handler.save_uploaded_file(file.filename, await file.read())
             
             # Extract information using NLP service
-            extracted_info = nlp_service.extract_document_info(file_path)
+            extracted_info = get_nlp_service().extract_document_info(file_path)
             extracted_info = json.dumps(extracted_info)
         
         tender_id = db.insert_tender(
@@ -132,6 +506,7 @@ async def create_tender(
             file_path=file_path,
             extracted_info=extracted_info
         )
+        invalidate_cached_data()
         
         return {"tender_id": tender_id, "message": "Tender created successfully"}
     except Exception as e:
@@ -141,7 +516,7 @@ async def create_tender(
 async def get_bids(tender_id: Optional[int] = None):
     """Get all bids or filtered by tender_id"""
     try:
-        bids_df = db.get_bids(tender_id)
+        bids_df = load_bids() if tender_id is None else db.get_bids(tender_id)
         return bids_df.to_dict('records')
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -180,6 +555,7 @@ async def create_bid(bid: BidCreate):
                 )
         except Exception as ml_error:
             print(f"ML analysis failed: {ml_error}")
+        invalidate_cached_data()
         
         return {"bid_id": bid_id, "message": "Bid submitted successfully"}
     except Exception as e:
@@ -189,7 +565,7 @@ async def create_bid(bid: BidCreate):
 async def get_alerts():
     """Get all active alerts"""
     try:
-        alerts_df = db.get_ai_alerts()
+        alerts_df = load_alerts()
         return alerts_df.to_dict('records')
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -203,17 +579,117 @@ async def get_suspicious_bids():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/bids/histogram")
+async def get_bid_histogram(field: str = "bid_amount", bins: int = HISTOGRAM_BINS):
+    """Get a pre-binned histogram of a bid field or a derived bid-tender measure"""
+    if field not in ("bid_amount", "anomaly_score", "bid_ratio", "response_hours"):
+        raise HTTPException(status_code=400, detail="field must be 'bid_amount', 'anomaly_score', 'bid_ratio' or 'response_hours'")
+    if not 1 <= bins <= HISTOGRAM_MAX_BINS:
+        raise HTTPException(status_code=400, detail=f"bins must be between 1 and {HISTOGRAM_MAX_BINS}")
+    
+    try:
+        return load_bid_histogram(field, bins)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/bids/histogram/stream")
+async def stream_bid_histogram(bins: int = HISTOGRAM_BINS, chunk_size: int = BID_CHUNK_SIZE):
+    """Stream running bid amount histogram counts as NDJSON while bids are read in chunks"""
+    if not 1 <= bins <= HISTOGRAM_MAX_BINS:
+        raise HTTPException(status_code=400, detail=f"bins must be between 1 and {HISTOGRAM_MAX_BINS}")
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be at least 1")
+    
+    def progress():
+        # The response has started by the time this runs, so errors become a final NDJSON record
+        try:
+            lo, hi = db.get_bid_amount_range()
+            if lo is None:
+                yield json.dumps({"edges": [], "counts": [], "rows": 0, "done": True}) + "\n"
+                return
+            if lo == hi:
+                lo, hi = lo - 0.5, hi + 0.5
+            
+            # Fixed edges from the SQL range let every chunk add into the same bins
+            edges = np.linspace(lo, hi, bins + 1)
+            counts = np.zeros(bins, dtype=np.int64)
+            rows = 0
+            for i, chunk in enumerate(db.iter_bids(chunk_size), start=1):
+                counts += np.histogram(chunk['bid_amount'].dropna().to_numpy(dtype=float), bins=edges)[0]
+                rows += len(chunk)
+                if i % PROGRESS_EVERY_CHUNKS == 0:
+                    yield json.dumps({"edges": edges.tolist(), "counts": counts.tolist(), "rows": rows, "done": False}) + "\n"
+            yield json.dumps({"edges": edges.tolist(), "counts": counts.tolist(), "rows": rows, "done": True}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e), "done": True}) + "\n"
+    
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+@app.get("/api/analysis/summary")
+async def get_analysis_summary():
+    """Get precomputed tender status, department and bid summaries for the dashboards"""
+    try:
+        return load_aggregates()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/patterns")
+async def get_bidding_patterns():
+    """Get after-hours, weekend and round-number bid rates"""
+    try:
+        return load_bidding_patterns()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/suspicious-companies")
+async def get_suspicious_companies(limit: int = 10):
+    """Get companies with the most suspicious bids"""
+    try:
+        companies_df = db.top_suspicious_companies(limit)
+        return companies_df.to_dict('records')
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/bid-boxstats")
+async def get_bid_boxstats():
+    """Get bid amount box plot statistics for normal and suspicious bids"""
+    try:
+        return load_bid_boxstats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/score-timeline")
+async def get_score_timeline(points: int = TIMELINE_POINT_LIMIT):
+    """Get anomaly scores over submission time, LTTB-downsampled per series for plotting"""
+    if not 3 <= points <= TIMELINE_POINT_LIMIT:
+        raise HTTPException(status_code=400, detail=f"points must be between 3 and {TIMELINE_POINT_LIMIT}")
+    
+    try:
+        return load_score_timeline(points)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/bid-scatter")
+async def get_bid_scatter():
+    """Get bid amount vs anomaly score points, clipped to the 1-99 percentile bid range"""
+    try:
+        return load_bid_scatter()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/analysis/train")
-async def train_ml_model():
-    """Train the ML model with current bid data"""
+async def train_ml_model(force: bool = False):
+    """Train the ML model with current bid data; force refits even if the model is up to date"""
     try:
         bids_df = db.get_bids()
         if len(bids_df) == 0:
             raise HTTPException(status_code=400, detail="No bid data available for training")
         
-        success = ml_service.train_model(bids_df)
-        if success:
-            return {"message": "Model trained successfully"}
+        result = ml_service.train_model(bids_df, force=force)
+        if result == UP_TO_DATE:
+            return {"message": "Model is already up to date", "status": result}
+        if result:
+            return {"message": "Model trained successfully", "status": result}
         else:
             raise HTTPException(status_code=500, detail="Model training failed")
     except Exception as e:
@@ -234,17 +710,20 @@ async def analyze_bid(bid_data: dict):
 
 class ChatbotRequest(BaseModel):
     message: str
-    history: Optional[List] = []
+    # Either send history explicitly or a session_id whose window the server keeps
+    history: Optional[List] = None
+    session_id: Optional[str] = None
 
 @app.post("/api/chatbot")
 async def chat_with_bot(request: ChatbotRequest):
     """Chat with the AI assistant with conversation history support"""
-    if not CHATBOT_AVAILABLE or chatbot_service is None:
+    chatbot_service = get_chatbot_service()
+    if chatbot_service is None:
         # Fallback response when chatbot is not available
         return {"response": "Hello! I'm currently in basic mode. You can ask me about tenders, bids, or system features. For more advanced assistance, the AI chatbot service needs to be configured."}
     
     try:
-        response_data = chatbot_service.get_response(request.message, request.history)
+        response_data = chatbot_service.get_response(request.message, request.history, request.session_id)
         return {
             "response": response_data.get("response", response_data) if isinstance(response_data, dict) else response_data,
             "source": response_data.get("source", "AI Assistant") if isinstance(response_data, dict) else "AI Assistant",
@@ -254,26 +733,49 @@ async def chat_with_bot(request: ChatbotRequest):
         # Fallback to FAQ if chatbot service fails
         return {"response": f"Sorry, I'm having technical difficulties. Please try again later.", "source": "Error Handler", "confidence": 0.0}
 
+@app.post("/api/chatbot/stream")
+async def chat_with_bot_stream(request: ChatbotRequest):
+    """Chat with the AI assistant, streaming the response text as it is generated"""
+    chatbot_service = get_chatbot_service()
+    if chatbot_service is None:
+        return PlainTextResponse(
+            "Hello! I'm currently in basic mode. You can ask me about tenders, bids, or system features. For more advanced assistance, the AI chatbot service needs to be configured.",
+            headers={"X-Response-Source": "AI Assistant"}
+        )
+    
+    # Headers go out before the body, so take the first chunk now to learn where the reply comes from;
+    # a Gemini failure shows up here rather than after an "AI" header has been sent
+    parts = chatbot_service.stream_response(request.message, request.history, request.session_id)
+    source, first_text = await run_in_threadpool(next, parts)
+    
+    def texts():
+        yield first_text
+        for _, text in parts:
+            yield text
+    
+    return StreamingResponse(
+        texts(),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Response-Source": source}
+    )
+
+@app.delete("/api/chatbot/session/{session_id}")
+async def end_chat_session(session_id: str):
+    """Discard the server-side conversation window for a chat session"""
+    # Nothing to discard if the chatbot has not been started yet
+    chatbot_service = _lazy_services.get("chatbot")
+    if chatbot_service is not None:
+        chatbot_service.end_session(session_id)
+    return {"message": "Chat session cleared", "session_id": session_id}
+
 # Alert management endpoints
 @app.put("/api/alerts/{alert_id}/resolve")
 async def resolve_alert(alert_id: int):
     """Mark an alert as resolved"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        # Update alert status to resolved
-        cursor.execute(
-            "UPDATE ai_alerts SET status = 'resolved', updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (alert_id,)
-        )
-        
-        if cursor.rowcount == 0:
-            conn.close()
+        if not db.resolve_alert(alert_id):
             raise HTTPException(status_code=404, detail="Alert not found")
-        
-        conn.commit()
-        conn.close()
+        invalidate_cached_data()
         
         return {"message": "Alert marked as resolved successfully", "alert_id": alert_id}
     except HTTPException:
@@ -318,7 +820,7 @@ async def get_model_status():
     """Get ML model training status and information"""
     try:
         model_info = ml_service.get_model_info()
-        bids_df = db.get_bids()
+        bids_df = load_bids()
         total_bids = len(bids_df)
         
         return {
@@ -334,24 +836,35 @@ async def get_model_status():
         raise HTTPException(status_code=500, detail="Failed to get model status")
 
 @app.post("/api/model/train")
-async def train_model():
-    """Train the ML model with current bid data"""
+async def train_model(force: bool = False):
+    """Train the ML model with current bid data; force refits even if the model is up to date"""
     try:
         bids_df = db.get_bids()
         
         if len(bids_df) < 10:
             raise HTTPException(status_code=400, detail="Need at least 10 bids to train the model")
         
-        success = ml_service.train_model(bids_df)
+        result = ml_service.train_model(bids_df, force=force)
         
-        if not success:
+        if not result:
             raise HTTPException(status_code=500, detail="Model training failed")
         
+        # Existing scores and alerts already reflect the current model
+        if result == UP_TO_DATE:
+            return {
+                "message": "Model is already up to date",
+                "total_bids": len(bids_df),
+                "status": result,
+                "success": True
+            }
+        
         # Run analysis on all existing bids
         anomaly_scores, is_anomaly = ml_service.detect_anomalies(bids_df)
         
-        suspicious_count = 0
+        suspicious_count = int(np.count_nonzero(is_anomaly))
         if len(anomaly_scores) > 0:
+            # Explain all flagged bids in one batch; alerts consume them in row order
+            explanations = iter(ml_service.explain_batch(bids_df[is_anomaly], anomaly_scores[is_anomaly]))
             for idx, (_, bid) in enumerate(bids_df.iterrows()):
                 db.update_bid_anomaly_score(
                     bid['id'], 
@@ -360,19 +873,20 @@ async def train_model():
                 )
                 
                 if is_anomaly[idx]:
-                    suspicious_count += 1
                     db.create_ai_alert(
                         alert_type="Suspicious Bid",
                         severity="medium",
-                        message=f"Suspicious bid detected during model retraining for bid ID {bid['id']}",
+                        message=f"Suspicious bid detected during model retraining for bid ID {bid['id']}: {'; '.join(next(explanations))}",
                         related_entity_type="bid",
                         related_entity_id=bid['id']
                     )
+        invalidate_cached_data()
         
         return {
             "message": "Model trained successfully",
             "total_bids": len(bids_df),
             "suspicious_count": suspicious_count,
+            "status": result,
             "success": True
         }
     except HTTPException:
@@ -387,7 +901,7 @@ async def test_model_performance():
         if not ml_service.is_trained:
             raise HTTPException(status_code=400, detail="Model is not trained yet")
         
-        bids_df = db.get_bids()
+        bids_df = load_bids()
         
         if len(bids_df) == 0:
             raise HTTPException(status_code=400, detail="No bid data available for testing")
@@ -397,8 +911,10 @@ async def test_model_performance():
         if len(anomaly_scores) == 0:
             raise HTTPException(status_code=500, detail="Could not generate predictions")
         
+        # Reduce with NumPy on the plain bool/float arrays instead of Python-level sum/min/max
+        is_anomaly = np.asarray(is_anomaly, dtype=bool)
         total_predictions = len(anomaly_scores)
-        anomalies_detected = sum(is_anomaly)
+        anomalies_detected = int(np.count_nonzero(is_anomaly))
         detection_rate = (anomalies_detected / total_predictions) * 100
         
         return {
@@ -406,9 +922,9 @@ async def test_model_performance():
             "anomalies_detected": anomalies_detected,
             "detection_rate": round(detection_rate, 1),
             "score_range": {
-                "min": float(min(anomaly_scores)),
-                "max": float(max(anomaly_scores)),
-                "avg": float(sum(anomaly_scores) / len(anomaly_scores))
+                "min": float(anomaly_scores.min()),
+                "max": float(anomaly_scores.max()),
+                "avg": float(anomaly_scores.mean())
             },
             "success": True
         }
@@ -422,14 +938,13 @@ async def test_model_performance():
 async def get_system_metrics():
     """Get system overview metrics for dashboard"""
     try:
-        tender_count = db.get_tender_count()
-        bid_count = db.get_bid_count()
-        alert_count = db.get_alert_count()
+        tender_count, bid_count, alert_count = get_system_counts()
         
-        alerts_df = db.get_ai_alerts()
-        high_alerts = len(alerts_df[alerts_df['severity'] == 'high']) if len(alerts_df) > 0 else 0
-        medium_alerts = len(alerts_df[alerts_df['severity'] == 'medium']) if len(alerts_df) > 0 else 0
-        low_alerts = len(alerts_df[alerts_df['severity'] == 'low']) if len(alerts_df) > 0 else 0
+        alerts_df = load_alerts()
+        severity_counts = alerts_df['severity'].value_counts()
+        high_alerts = int(severity_counts.get('high', 0))
+        medium_alerts = int(severity_counts.get('medium', 0))
+        low_alerts = int(severity_counts.get('low', 0))
         
         return {
             "active_tenders": tender_count,
@@ -445,10 +960,23 @@ async def get_system_metrics():
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to get system metrics")
 
+@app.get("/api/system/table-counts")
+async def get_system_table_counts():
+    """Get row counts for each data table without loading any rows"""
+    try:
+        return get_table_counts()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/faqs")
 async def get_faqs():
     """Get frequently asked questions"""
     try:
+        # Reuse the FAQ data already loaded by the chatbot singleton
+        chatbot_service = _lazy_services.get("chatbot")
+        if chatbot_service is not None:
+            return chatbot_service.faqs
+        
         faqs_path = "data/faqs.json"
         if os.path.exists(faqs_path):
             with open(faqs_path, 'r') as f:
@@ -460,9 +988,9 @@ async def get_faqs():
 
 # Frontend compatibility aliases - fixes endpoint mismatches
 @app.post("/api/ml/train")
-async def train_model_alias():
+async def train_model_alias(force: bool = False):
     """Alias for /api/model/train to match frontend expectations"""
-    return await train_model()
+    return await train_model(force)
 
 @app.post("/api/ml/test")  
 async def test_model_alias():
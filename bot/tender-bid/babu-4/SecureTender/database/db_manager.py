@@ -1,12 +1,81 @@
 import sqlite3
 import os
+import threading
+import contextlib
+import itertools
 import json
 from datetime import datetime
 import pandas as pd
 
+# Narrow dtypes for bid frames; bid_amount stays float64 to keep currency precision.
+# Low-cardinality text columns are categorical so grouping and counting hash small ints.
+BID_DTYPES = {
+    'id': 'int32',
+    'tender_id': 'int32',
+    'anomaly_score': 'float32',
+    'is_suspicious': 'bool',
+    'company_name': 'category',
+}
+
+# Tender ids match the bid tender_id dtype so joins hash typed ints on both sides
+TENDER_DTYPES = {
+    'id': 'int32',
+    'department': 'category',
+    'status': 'category',
+}
+
+ALERT_DTYPES = {
+    'id': 'int32',
+    'alert_type': 'category',
+    'severity': 'category',
+    'status': 'category',
+}
+
+# Tables holding application data, the only ones that may be counted or cleared by name
+DATA_TABLES = ('tenders', 'bids', 'audit_logs', 'ai_alerts')
+
+# Secondary indexes on bids, by name, so bulk loads can drop and rebuild them
+BID_INDEXES = {
+    # Suspicious-bid aggregations by company
+    'idx_bids_suspicious_company': 'bids (is_suspicious, company_name)',
+    # Matches the newest-first ORDER BY of the list queries, so rows come back pre-sorted
+    'idx_bids_submitted_at': 'bids (submitted_at)',
+}
+
+# Bid writes share these exact strings so sqlite3's per-connection statement cache reuses the parsed statements
+INSERT_BID_SQL = '''
+INSERT INTO bids (tender_id, company_name, contact_email, bid_amount, proposal)
+VALUES (?, ?, ?, ?, ?)
+'''
+# Bulk loads insert this many bids per statement; SQLite builds before 3.32 allow at most 999 parameters
+BULK_INSERT_ROWS = 999 // 5
+INSERT_BIDS_BATCH_SQL = '''
+INSERT INTO bids (tender_id, company_name, contact_email, bid_amount, proposal)
+VALUES ''' + ', '.join(['(?, ?, ?, ?, ?)'] * BULK_INSERT_ROWS)
+INSERT_AUDIT_LOG_SQL = '''
+INSERT INTO audit_logs (action, entity_type, entity_id, details)
+VALUES (?, ?, ?, ?)
+'''
+
+def batched_rows(rows, size, remainder):
+    """Yield rows flattened size at a time for a multi-row INSERT, leaving a short final batch in remainder"""
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if len(batch) < size:
+            remainder.extend(batch)
+            return
+        yield tuple(itertools.chain.from_iterable(batch))
+
+def parse_timestamps(column):
+    """Parse SQLite timestamp strings once at load time; the explicit format skips per-row inference"""
+    return pd.to_datetime(column, format='ISO8601')
+
 class DatabaseManager:
     def __init__(self, db_path="actms.db"):
         self.db_path = db_path
+        self._conn = None
+        self._conn_lock = threading.Lock()
         self.init_database()
     
     def init_database(self):
@@ -14,6 +83,9 @@ class DatabaseManager:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL is stored in the database file, so every later connection appends instead of rewriting pages
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Tenders table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS tenders (
@@ -74,13 +146,68 @@ class DatabaseManager:
         )
         ''')
         
+        # Bid indexes, listed in BID_INDEXES
+        self._create_bid_indexes(cursor)
+        
+        # Indexes matching the newest-first ORDER BY of the list queries, so rows come back pre-sorted
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tenders_created_at ON tenders (created_at)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ai_alerts_status_created_at ON ai_alerts (status, created_at)
+        ''')
+        
         conn.commit()
         conn.close()
     
+    def _create_bid_indexes(self, cursor):
+        """Create any missing BID_INDEXES"""
+        for name, columns in BID_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+    
     def get_connection(self):
         """Get database connection"""
         return sqlite3.connect(self.db_path)
     
+    def get_shared_connection(self):
+        """Get the long-lived WAL connection used for small, frequent writes"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+    
+    def close(self):
+        """Close the shared connection, if one was opened; later writes reopen it"""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    @contextlib.contextmanager
+    def transaction(self):
+        """Yield a connection whose writes commit together on exit, or roll back on error"""
+        conn = self.get_connection()
+        # Manage the transaction explicitly; take the write lock up front so it cannot fail mid-batch
+        conn.isolation_level = None
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+    
+    def _apply_bid_dtypes(self, df):
+        """Cast bid columns to compact dtypes (SQLite returns 0/1/None for booleans)"""
+        df['is_suspicious'] = df['is_suspicious'].fillna(False)
+        df['submitted_at'] = parse_timestamps(df['submitted_at'])
+        return df.astype(BID_DTYPES)
+    
     def insert_tender(self, title, description, department, estimated_value, deadline, file_path=None, extracted_info=None):
         """Insert a new tender"""
         conn = self.get_connection()
@@ -111,31 +238,57 @@ class DatabaseManager:
     
     def insert_bid(self, tender_id, company_name, contact_email, bid_amount, proposal):
         """Insert a new bid"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Insert bid
-            cursor.execute('''
-            INSERT INTO bids (tender_id, company_name, contact_email, bid_amount, proposal)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (tender_id, company_name, contact_email, bid_amount, proposal))
+        # The long-lived connection keeps both INSERTs prepared between submissions
+        with self._conn_lock:
+            conn = self.get_shared_connection()
+            cursor = conn.cursor()
             
-            bid_id = cursor.lastrowid
+            try:
+                # Insert bid
+                cursor.execute(INSERT_BID_SQL, (tender_id, company_name, contact_email, bid_amount, proposal))
+                
+                bid_id = cursor.lastrowid
+                
+                # Log the action using the same connection
+                cursor.execute(INSERT_AUDIT_LOG_SQL, ("CREATE", "bid", bid_id, f"Submitted bid by {company_name}"))
+                
+                conn.commit()
+                return bid_id
+            except Exception as e:
+                conn.rollback()
+                raise e
+    
+    def insert_bids_bulk(self, rows, rebuild_indexes=False):
+        """Insert an iterable of (tender_id, company_name, contact_email, bid_amount, proposal) rows in one transaction"""
+        with self.transaction() as conn:
+            cursor = conn.cursor()
             
-            # Log the action using the same connection
+            # For a batch that is large next to the table, indexing once afterwards beats updating every index per row
+            if rebuild_indexes:
+                for name in BID_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            
+            # Multi-row VALUES lists cut the per-statement work; the leftover rows go in one at a time after them
+            leftover = []
+            cursor.executemany(INSERT_BIDS_BATCH_SQL, batched_rows(rows, BULK_INSERT_ROWS, leftover))
+            inserted = cursor.rowcount
+            cursor.executemany(INSERT_BID_SQL, leftover)
+            inserted += cursor.rowcount
+            
+            # The transaction holds the write lock, so the new ids are consecutive up to the last one
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            bid_ids = range(last_id - inserted + 1, last_id + 1)
+            
+            # Build the audit entries from the inserted rows so the batch never has to be kept in memory
             cursor.execute('''
             INSERT INTO audit_logs (action, entity_type, entity_id, details)
-            VALUES (?, ?, ?, ?)
-            ''', ("CREATE", "bid", bid_id, f"Submitted bid by {company_name}"))
+            SELECT 'CREATE', 'bid', id, 'Submitted bid by ' || company_name FROM bids WHERE id BETWEEN ? AND ? ORDER BY id
+            ''', (bid_ids.start, last_id))
             
-            conn.commit()
-            return bid_id
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+            if rebuild_indexes:
+                self._create_bid_indexes(cursor)
+        
+        return bid_ids
     
     def update_bid_anomaly_score(self, bid_id, anomaly_score, is_suspicious):
         """Update bid with anomaly detection results"""
@@ -177,6 +330,14 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
+    def resolve_alert(self, alert_id):
+        """Mark an alert as resolved; returns False if the alert does not exist"""
+        with self._conn_lock:
+            conn = self.get_shared_connection()
+            cursor = conn.execute("UPDATE ai_alerts SET status = ? WHERE id = ?", ('resolved', alert_id))
+            conn.commit()
+            return cursor.rowcount > 0
+    
     def get_tenders(self, status=None):
         """Get all tenders or filtered by status"""
         conn = self.get_connection()
@@ -189,7 +350,8 @@ class DatabaseManager:
             df = pd.read_sql_query(query, conn)
         
         conn.close()
-        return df
+        df['created_at'] = parse_timestamps(df['created_at'])
+        return df.astype(TENDER_DTYPES)
     
     def get_bids(self, tender_id=None):
         """Get all bids or filtered by tender_id"""
@@ -214,7 +376,32 @@ class DatabaseManager:
             df = pd.read_sql_query(query, conn)
         
         conn.close()
-        return df
+        return self._apply_bid_dtypes(df)
+    
+    def iter_bids(self, chunk_size=50_000):
+        """Yield all bids in id order as typed frames of at most chunk_size rows"""
+        conn = self.get_connection()
+        
+        query = '''
+        SELECT b.*, t.title as tender_title 
+        FROM bids b 
+        JOIN tenders t ON b.tender_id = t.id 
+        ORDER BY b.id
+        '''
+        try:
+            for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+                yield self._apply_bid_dtypes(chunk)
+        finally:
+            conn.close()
+    
+    def get_bid_amount_range(self):
+        """Get the minimum and maximum bid amount (None, None when there are no bids)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(b.bid_amount), MAX(b.bid_amount) FROM bids b JOIN tenders t ON b.tender_id = t.id")
+        amount_range = cursor.fetchone()
+        conn.close()
+        return amount_range
     
     def get_suspicious_bids(self):
         """Get all suspicious bids"""
@@ -229,6 +416,23 @@ class DatabaseManager:
         '''
         df = pd.read_sql_query(query, conn)
         
+        conn.close()
+        return self._apply_bid_dtypes(df)
+    
+    def top_suspicious_companies(self, limit=10):
+        """Get companies with the most suspicious bids"""
+        conn = self.get_connection()
+        
+        query = '''
+        SELECT company_name, COUNT(*) AS suspicious_count
+        FROM bids
+        WHERE is_suspicious = TRUE
+        GROUP BY company_name
+        ORDER BY suspicious_count DESC
+        LIMIT ?
+        '''
+        df = pd.read_sql_query(query, conn, params=(limit,))
+        
         conn.close()
         return df
     
@@ -240,7 +444,8 @@ class DatabaseManager:
         df = pd.read_sql_query(query, conn, params=(status,))
         
         conn.close()
-        return df
+        df['created_at'] = parse_timestamps(df['created_at'])
+        return df.astype(ALERT_DTYPES)
     
     def get_tender_count(self):
         """Get total number of active tenders"""
@@ -269,6 +474,43 @@ class DatabaseManager:
         conn.close()
         return count
     
+    def get_system_counts(self):
+        """Get active tender, bid and active alert counts in a single query"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT
+            (SELECT COUNT(*) FROM tenders WHERE status = 'active'),
+            (SELECT COUNT(*) FROM bids),
+            (SELECT COUNT(*) FROM ai_alerts WHERE status = 'active')
+        ''')
+        counts = cursor.fetchone()
+        conn.close()
+        return counts
+    
+    def count(self, table_name):
+        """Get the number of rows in a data table"""
+        if table_name not in DATA_TABLES:
+            raise ValueError(f"Invalid table name. Valid tables: {list(DATA_TABLES)}")
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def counts(self):
+        """Get the number of rows in every data table with one query"""
+        query = " UNION ALL ".join(f"SELECT '{table}', COUNT(*) FROM {table}" for table in DATA_TABLES)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query)
+        counts = dict(cursor.fetchall())
+        conn.close()
+        return counts
+    
     def get_tender_by_id(self, tender_id):
         """Get a specific tender by ID"""
         conn = self.get_connection()
@@ -315,9 +557,8 @@ class DatabaseManager:
     
     def clear_table_data(self, table_name):
         """Clear data from a specific table"""
-        valid_tables = ['tenders', 'bids', 'audit_logs', 'ai_alerts']
-        if table_name not in valid_tables:
-            return False, f"Invalid table name. Valid tables: {valid_tables}"
+        if table_name not in DATA_TABLES:
+            return False, f"Invalid table name. Valid tables: {list(DATA_TABLES)}"
             
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -1,8 +1,46 @@
+import functools
 import json
 import os
+import re
+import time
+import threading
+from collections import OrderedDict, deque, namedtuple
 from google import genai
 from google.genai import types
 
+# Response cache settings
+RESPONSE_CACHE_TTL = 3600  # seconds
+RESPONSE_CACHE_SIZE = 512
+
+# Messages differing only in case or spacing share a cache entry
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Keywords that signal each intent, in the order intents are reported
+INTENT_KEYWORDS = {
+    "tender_submission": ["submit tender", "upload tender", "create tender", "new tender"],
+    "bid_submission": ["submit bid", "place bid", "bid on", "bidding"],
+    "ai_analysis": ["ai analysis", "anomaly", "suspicious", "detection", "alert"],
+    "system_help": ["how to", "help", "guide", "tutorial", "instructions"],
+    "technical_support": ["error", "problem", "issue", "not working", "bug"],
+    "general_info": ["what is", "about", "explain", "information"]
+}
+
+# One scan finds every intent: each intent is a named group, and the lookahead lets matches overlap
+_INTENT_RE = re.compile("(?=" + "|".join(
+    f"(?P<{intent}>{'|'.join(map(re.escape, keywords))})" for intent, keywords in INTENT_KEYWORDS.items()
+) + ")")
+
+# Server-side conversation windows, one per chat session
+SESSION_WINDOW = 10  # messages kept per session
+MAX_SESSIONS = 1000
+
+# A single conversation message; tuples keep windows compact and usable as cache keys
+Message = namedtuple("Message", "role content")
+
+def to_api(messages):
+    """Convert Message tuples to the {"role", "content"} dicts used by the HTTP API"""
+    return [{"role": msg.role, "content": msg.content} for msg in messages]
+
 class ChatbotService:
     def __init__(self):
         # Initialize Gemini client (using python_gemini integration)
@@ -10,8 +48,17 @@ class ChatbotService:
         self.client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
         self.model = "gemini-2.5-flash"
         
-        # Load FAQ data
+        # Load FAQ data (parsed once per process and shared by every instance)
         self.faqs = self.load_faqs()
+        self._faq_index = self.build_faq_index()
+        
+        # (user_message, recent history) -> (stored_at, response_text)
+        self._response_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # session_id -> deque of the most recent messages, least recently used first
+        self._sessions = OrderedDict()
+        self._sessions_lock = threading.Lock()
         
         # System prompt for the chatbot
         self.system_prompt = """You are an AI assistant for the Anti-Corruption Tender Management System (ACTMS). 
@@ -28,15 +75,28 @@ class ChatbotService:
         If you don't know something specific about the system, suggest they contact support or check the documentation.
         """
     
-    def load_faqs(self):
+    @staticmethod
+    @functools.cache
+    def load_faqs():
         """Load FAQ data from JSON file"""
         try:
             with open('data/faqs.json', 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
-            return self.get_default_faqs()
+            return ChatbotService.get_default_faqs()
     
-    def get_default_faqs(self):
+    @staticmethod
+    @functools.cache
+    def build_faq_index():
+        """Pre-split FAQ questions into (token set, answer) pairs for check_faqs"""
+        return tuple(
+            (frozenset(faq["question"].lower().split()), faq["answer"])
+            for category in ChatbotService.load_faqs().values()
+            for faq in category
+        )
+    
+    @staticmethod
+    def get_default_faqs():
         """Default FAQ data if file not found"""
         return {
             "general": [
@@ -75,30 +135,32 @@ class ChatbotService:
             ]
         }
     
-    def get_response(self, user_message, conversation_history=None):
+    def get_response(self, user_message, conversation_history=None, session_id=None):
         """Get chatbot response using Gemini API"""
         try:
+            conversation_history = self._context_window(conversation_history, session_id)
+            
             # Check if the question matches any FAQ first
             faq_response = self.check_faqs(user_message)
             if faq_response:
+                self.record_turn(session_id, user_message, faq_response)
                 return {
                     "response": faq_response,
                     "source": "FAQ",
                     "confidence": 0.9
                 }
             
-            # Prepare conversation context
-            conversation_text = ""
-            if conversation_history:
-                for msg in conversation_history[-5:]:  # Keep last 5 messages
-                    role = "User" if msg["role"] == "user" else "Assistant"
-                    conversation_text += f"{role}: {msg['content']}\n"
+            cache_key = self._cache_key(user_message, conversation_history)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                self.record_turn(session_id, user_message, cached)
+                return {
+                    "response": cached,
+                    "source": "AI",
+                    "confidence": 0.8
+                }
             
-            # Create the prompt with system instructions and conversation context
-            full_prompt = f"{self.system_prompt}\n\n"
-            if conversation_text:
-                full_prompt += f"Previous conversation:\n{conversation_text}\n"
-            full_prompt += f"User: {user_message}\nAssistant:"
+            full_prompt = self.build_prompt(user_message, conversation_history)
             
             # Get response from Gemini
             response = self.client.models.generate_content(
@@ -106,6 +168,10 @@ class ChatbotService:
                 contents=full_prompt
             )
             
+            if response.text:
+                self._store_cached_response(cache_key, response.text)
+                self.record_turn(session_id, user_message, response.text)
+            
             return {
                 "response": response.text if response.text else "I'm sorry, I couldn't generate a response.",
                 "source": "AI",
@@ -119,18 +185,139 @@ class ChatbotService:
                 "confidence": 0.0
             }
     
+    def stream_response(self, user_message, conversation_history=None, session_id=None):
+        """Yield (source, text) pairs as Gemini generates the response; source is FAQ, AI or Error"""
+        try:
+            conversation_history = self._context_window(conversation_history, session_id)
+            
+            faq_response = self.check_faqs(user_message)
+            if faq_response:
+                self.record_turn(session_id, user_message, faq_response)
+                yield "FAQ", faq_response
+                return
+            
+            cache_key = self._cache_key(user_message, conversation_history)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                self.record_turn(session_id, user_message, cached)
+                yield "AI", cached
+                return
+            
+            full_prompt = self.build_prompt(user_message, conversation_history)
+            
+            chunks = []
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=full_prompt
+            ):
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield "AI", chunk.text
+            
+            if chunks:
+                full_text = "".join(chunks)
+                self._store_cached_response(cache_key, full_text)
+                self.record_turn(session_id, user_message, full_text)
+            else:
+                yield "AI", "I'm sorry, I couldn't generate a response."
+        except Exception as e:
+            yield "Error", f"I apologize, but I'm experiencing technical difficulties. Please try again later or contact support. Error: {str(e)}"
+    
+    def get_session_history(self, session_id):
+        """Get the server-side conversation window for a session as Message tuples"""
+        if not session_id:
+            return ()
+        
+        with self._sessions_lock:
+            window = self._sessions.get(session_id)
+            if window is None:
+                return ()
+            self._sessions.move_to_end(session_id)
+            return tuple(window)
+    
+    def record_turn(self, session_id, user_message, response_text):
+        """Append a user message and its reply to the session's conversation window"""
+        if not session_id:
+            return
+        
+        with self._sessions_lock:
+            window = self._sessions.get(session_id)
+            if window is None:
+                window = self._sessions[session_id] = deque(maxlen=SESSION_WINDOW)
+                if len(self._sessions) > MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            window.append(Message("user", user_message))
+            window.append(Message("assistant", response_text))
+    
+    def end_session(self, session_id):
+        """Forget a session's conversation window"""
+        with self._sessions_lock:
+            self._sessions.pop(session_id, None)
+    
+    def _context_window(self, conversation_history, session_id):
+        """Get the Message tuples to use as context for a message"""
+        if conversation_history is None:
+            return self.get_session_history(session_id)
+        
+        # Explicit history from the client is converted once, keeping only what the window holds
+        return tuple(
+            Message(msg["role"], msg["content"]) for msg in conversation_history[-SESSION_WINDOW:]
+        )
+    
+    def _cache_key(self, user_message, conversation_history=()):
+        """Build a response cache key from the normalized message and the history the prompt uses"""
+        normalized_message = _WHITESPACE_RE.sub(" ", user_message.lower().strip())
+        return (normalized_message, tuple(conversation_history[-5:]))
+    
+    def _get_cached_response(self, key):
+        """Get a cached response if it exists and has not expired"""
+        with self._cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is None:
+                return None
+            
+            stored_at, text = entry
+            if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+                del self._response_cache[key]
+                return None
+            
+            self._response_cache.move_to_end(key)
+            return text
+    
+    def _store_cached_response(self, key, text):
+        """Cache a response, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self._response_cache[key] = (time.monotonic(), text)
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def build_prompt(self, user_message, conversation_history=()):
+        """Build the Gemini prompt from system instructions and Message context"""
+        # Prepare conversation context
+        conversation_text = ""
+        if conversation_history:
+            for msg in conversation_history[-5:]:  # Keep last 5 messages
+                role = "User" if msg.role == "user" else "Assistant"
+                conversation_text += f"{role}: {msg.content}\n"
+        
+        # Create the prompt with system instructions and conversation context
+        full_prompt = f"{self.system_prompt}\n\n"
+        if conversation_text:
+            full_prompt += f"Previous conversation:\n{conversation_text}\n"
+        full_prompt += f"User: {user_message}\nAssistant:"
+        return full_prompt
+    
     def check_faqs(self, user_message):
         """Check if user message matches any FAQ"""
-        user_message_lower = user_message.lower()
+        user_words = set(user_message.lower().split())
         
         # Simple keyword matching for FAQs
-        for category in self.faqs.values():
-            for faq in category:
-                question_words = faq["question"].lower().split()
-                # Check if most question words are in user message
-                matches = sum(1 for word in question_words if word in user_message_lower)
-                if matches >= len(question_words) * 0.6:  # 60% match threshold
-                    return faq["answer"]
+        for question_words, answer in self._faq_index:
+            # Check if most question words are in user message
+            if len(question_words & user_words) >= len(question_words) * 0.6:  # 60% match threshold
+                return answer
         
         return None
     
@@ -144,23 +331,8 @@ class ChatbotService:
     
     def analyze_user_intent(self, message):
         """Analyze user intent for better responses"""
-        message_lower = message.lower()
-        
-        intents = {
-            "tender_submission": ["submit tender", "upload tender", "create tender", "new tender"],
-            "bid_submission": ["submit bid", "place bid", "bid on", "bidding"],
-            "ai_analysis": ["ai analysis", "anomaly", "suspicious", "detection", "alert"],
-            "system_help": ["how to", "help", "guide", "tutorial", "instructions"],
-            "technical_support": ["error", "problem", "issue", "not working", "bug"],
-            "general_info": ["what is", "about", "explain", "information"]
-        }
-        
-        detected_intents = []
-        for intent, keywords in intents.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    detected_intents.append(intent)
-                    break
+        hits = {match.lastgroup for match in _INTENT_RE.finditer(message.lower())}
+        detected_intents = [intent for intent in INTENT_KEYWORDS if intent in hits]
         
         return detected_intents if detected_intents else ["general_info"]
     
@@ -1,22 +1,52 @@
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer
 import joblib
 import os
 from datetime import datetime
 
+MODEL_BUNDLE = 'anomaly_model.pkl'
+# Separate files written by earlier versions, still read when no bundle exists
+LEGACY_MODEL_FILES = ('isolation_forest.pkl', 'scaler.pkl', 'text_vectorizer.pkl')
+
+# Retrain only once the bid table has grown by this factor since the last fit
+RETRAIN_GROWTH = 1.25
+# train_model results other than False (too little data to train)
+TRAINED = "trained"
+UP_TO_DATE = "up_to_date"
+# The forest gains little past a few tens of thousands of samples; fit on the most recent ones
+MAX_TRAIN_ROWS = 50_000
+
+# Rows scored per decision_function call in detect_anomalies
+SCORING_CHUNK_ROWS = 4096
+# Below this many rows, spreading tree scoring over threads costs more than it saves
+PARALLEL_SCORING_ROWS = 1000
+
+# Per-tree subsample size ('auto' would pick the same, capped by the training set size)
+FOREST_MAX_SAMPLES = 256
+
+# Stateless text features: nothing to fit, refit or save as the bid stream grows
+TEXT_VECTORIZER = HashingVectorizer(n_features=100, alternate_sign=False, norm='l2', stop_words='english')
+
 class MLService:
     def __init__(self):
         self.isolation_forest = IsolationForest(
             contamination=0.1,  # Expect 10% outliers
             random_state=42,
-            n_estimators=100
+            n_estimators=100,
+            n_jobs=-1  # Build trees on all cores
         )
-        self.scaler = StandardScaler()
-        self.text_vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
+        # Isolation Forest splits are unaffected by centring, so skip it and keep features sparse
+        self.scaler = StandardScaler(with_mean=False)
+        # Fitted scaler parameters, applied directly when scoring
+        self._mean = None
+        self._inv_scale = None
+        self.text_vectorizer = TEXT_VECTORIZER
         self.is_trained = False
+        self.last_trained_rows = 0
         self.model_path = "models/"
         
         # Create models directory if it doesn't exist
@@ -27,89 +57,117 @@ class MLService:
     
     def extract_numerical_features(self, bids_df):
         """Extract numerical features from bids data"""
-        features = []
-        
-        for _, bid in bids_df.iterrows():
-            feature_vector = [
-                bid['bid_amount'],
-                len(bid['proposal']) if pd.notna(bid['proposal']) else 0,
-                len(bid['company_name']) if pd.notna(bid['company_name']) else 0,
-            ]
-            
-            # Add time-based features
-            submitted_at = bid.get('submitted_at', None)
-            if submitted_at and pd.notna(submitted_at):
-                try:
-                    submit_time = pd.to_datetime(submitted_at)
-                    feature_vector.extend([
-                        submit_time.hour,
-                        submit_time.weekday(),
-                    ])
-                except:
-                    feature_vector.extend([12, 2])  # Default values
-            else:
-                feature_vector.extend([12, 2])
-            
-            features.append(feature_vector)
+        bid_amount = bids_df['bid_amount'].to_numpy(dtype=float)
+        proposal_length = bids_df['proposal'].str.len().fillna(0).to_numpy(dtype=float)
+        company_name_length = bids_df['company_name'].str.len().fillna(0).to_numpy(dtype=float)
         
-        return np.array(features)
+        # Add time-based features; missing or unparseable times get default values
+        if 'submitted_at' in bids_df:
+            submit_time = pd.to_datetime(bids_df['submitted_at'], errors='coerce').dt
+            hour = submit_time.hour.fillna(12).to_numpy(dtype=float)
+            weekday = submit_time.weekday.fillna(2).to_numpy(dtype=float)
+        else:
+            hour = np.full(len(bids_df), 12.0)
+            weekday = np.full(len(bids_df), 2.0)
+        
+        return np.column_stack([bid_amount, proposal_length, company_name_length, hour, weekday])
     
     def extract_text_features(self, bids_df):
         """Extract text features from proposal content"""
-        proposals = []
-        for _, bid in bids_df.iterrows():
-            proposal_text = bid['proposal'] if pd.notna(bid['proposal']) else ""
-            company_name = bid['company_name'] if pd.notna(bid['company_name']) else ""
-            combined_text = f"{proposal_text} {company_name}"
-            proposals.append(combined_text)
+        # company_name is categorical when loaded from the database, so fill blanks as object
+        proposals = (
+            bids_df['proposal'].astype(object).fillna('').astype(str)
+            + ' '
+            + bids_df['company_name'].astype(object).fillna('').astype(str)
+        ).tolist()
         
-        if not self.is_trained:
-            text_features = self.text_vectorizer.fit_transform(proposals)
-        else:
-            text_features = self.text_vectorizer.transform(proposals)
+        text_features = self.text_vectorizer.transform(proposals)
         
-        return text_features.toarray()
+        return text_features.astype(np.float32)
     
     def prepare_features(self, bids_df):
         """Prepare features for anomaly detection"""
         if len(bids_df) == 0:
-            return np.array([])
+            return sparse.csr_matrix((0, 0), dtype=np.float32)
         
         # Extract numerical features
-        numerical_features = self.extract_numerical_features(bids_df)
+        numerical_features = sparse.csr_matrix(self.extract_numerical_features(bids_df).astype(np.float32))
         
         # Extract text features
         text_features = self.extract_text_features(bids_df)
         
-        # Combine features
-        if text_features.size > 0:
-            combined_features = np.hstack([numerical_features, text_features])
+        # Combine features as one sparse float32 matrix
+        if text_features.shape[1] > 0:
+            combined_features = sparse.hstack([numerical_features, text_features], format='csr')
         else:
             combined_features = numerical_features
         
         return combined_features
     
-    def train_model(self, bids_df):
-        """Train the anomaly detection model"""
+    def scale_features(self, features, fit=False):
+        """Scale features, densifying only for a saved scaler that centres its input"""
+        if self.scaler.with_mean:
+            features = features.toarray()
+        if fit:
+            self.scaler.fit(features)
+            self._cache_scaling()
+        return self._scale(features)
+    
+    def _cache_scaling(self):
+        """Keep the fitted scaler's mean and inverse scale as float32 arrays"""
+        self._mean = self.scaler.mean_.astype(np.float32) if self.scaler.with_mean else None
+        self._inv_scale = (1.0 / self.scaler.scale_).astype(np.float32)
+    
+    def _scale(self, features):
+        """Apply the cached scaling without StandardScaler.transform's per-call validation"""
+        if sparse.issparse(features):
+            # Only stored values change, so scale them by their column's factor in place on a copy
+            scaled = features.astype(np.float32)
+            scaled.data *= self._inv_scale[scaled.indices]
+            return scaled
+        return (features.astype(np.float32, copy=False) - self._mean) * self._inv_scale
+    
+    def train_model(self, bids_df, force=False):
+        """Train the anomaly detection model; returns TRAINED, UP_TO_DATE when the fit was skipped, or False"""
         if len(bids_df) < 10:  # Need minimum data to train
             return False
         
+        # The current model is still representative until the data grows enough;
+        # fewer rows than last time means bids were cleared or replaced, so refit
+        total_rows = len(bids_df)
+        if (
+            not force
+            and self.is_trained
+            and self.last_trained_rows <= total_rows < self.last_trained_rows * RETRAIN_GROWTH
+        ):
+            return UP_TO_DATE
+        
+        if total_rows > MAX_TRAIN_ROWS:
+            bids_df = bids_df.nlargest(MAX_TRAIN_ROWS, 'submitted_at')
+        
+        # Retraining drops any TF-IDF vocabulary loaded with an older model
+        self.text_vectorizer = TEXT_VECTORIZER
         features = self.prepare_features(bids_df)
         
-        if features.size == 0:
+        if features.shape[0] == 0:
             return False
         
         # Scale features
-        scaled_features = self.scaler.fit_transform(features)
+        scaled_features = self.scale_features(features, fit=True)
         
-        # Train isolation forest
+        # Train isolation forest; set_params also covers a forest loaded from an older model
+        self.isolation_forest.set_params(
+            n_jobs=-1,
+            max_samples=min(FOREST_MAX_SAMPLES, scaled_features.shape[0])
+        )
         self.isolation_forest.fit(scaled_features)
         self.is_trained = True
+        self.last_trained_rows = total_rows
         
         # Save the model
         self.save_model()
         
-        return True
+        return TRAINED
     
     def detect_anomalies(self, bids_df):
         """Detect anomalies in bids"""
@@ -118,19 +176,24 @@ class MLService:
         
         features = self.prepare_features(bids_df)
         
-        if features.size == 0:
+        if features.shape[0] == 0:
             return np.array([]), np.array([])
         
         try:
             # Scale features
-            scaled_features = self.scaler.transform(features)
+            scaled_features = self.scale_features(features)
             
-            # Predict anomalies
-            anomaly_predictions = self.isolation_forest.predict(scaled_features)
-            anomaly_scores = self.isolation_forest.decision_function(scaled_features)
+            # Score in row blocks so each block's features and tree paths stay cache-resident
+            n_rows = scaled_features.shape[0]
+            anomaly_scores = np.empty(n_rows)
+            # sklearn scores trees sequentially unless a joblib config asks for more workers
+            with joblib.parallel_config(n_jobs=-1 if n_rows >= PARALLEL_SCORING_ROWS else None):
+                for start in range(0, n_rows, SCORING_CHUNK_ROWS):
+                    end = start + SCORING_CHUNK_ROWS
+                    anomaly_scores[start:end] = self.isolation_forest.decision_function(scaled_features[start:end])
             
-            # Convert predictions to boolean (True for anomaly)
-            is_anomaly = anomaly_predictions == -1
+            # predict() is -1 exactly where decision_function() is negative, so skip the second pass
+            is_anomaly = anomaly_scores < 0
             
             return anomaly_scores, is_anomaly
         except Exception as e:
@@ -142,71 +205,115 @@ class MLService:
         if not self.is_trained:
             return 0.0, False
         
-        # Convert single bid to DataFrame format
-        bid_df = pd.DataFrame([bid_data])
+        try:
+            # Build the one-row feature matrix straight from the dict, skipping the DataFrame path
+            features = self.prepare_single_features(bid_data)
+            anomaly_score = float(self.isolation_forest.decision_function(self.scale_features(features))[0])
+            return anomaly_score, anomaly_score < 0
+        except Exception as e:
+            print(f"Error in anomaly detection: {e}")
+            return 0.0, False
+    
+    def prepare_single_features(self, bid_data):
+        """Build the same features as prepare_features for one bid dict"""
+        proposal = bid_data.get('proposal') or ''
+        company_name = bid_data.get('company_name') or ''
         
-        anomaly_scores, is_anomaly = self.detect_anomalies(bid_df)
+        # Missing or unparseable times get the same defaults as the batch path
+        submitted_at = pd.to_datetime(bid_data.get('submitted_at'), errors='coerce')
+        hour = submitted_at.hour if pd.notna(submitted_at) else 12
+        weekday = submitted_at.weekday() if pd.notna(submitted_at) else 2
         
-        if len(anomaly_scores) > 0:
-            return float(anomaly_scores[0]), bool(is_anomaly[0])
-        else:
-            return 0.0, False
+        numerical_features = sparse.csr_matrix(np.array(
+            [[float(bid_data.get('bid_amount') or 0), len(proposal), len(company_name), hour, weekday]],
+            dtype=np.float32
+        ))
+        text_features = self.text_vectorizer.transform([f"{proposal} {company_name}"]).astype(np.float32)
+        
+        if text_features.shape[1] > 0:
+            return sparse.hstack([numerical_features, text_features], format='csr')
+        return numerical_features
     
     def get_anomaly_explanation(self, bid_data, anomaly_score):
         """Provide explanation for anomaly detection"""
-        explanations = []
+        return self.explain_batch(pd.DataFrame([bid_data]), [anomaly_score])[0]
+    
+    def explain_batch(self, bids_df, anomaly_scores):
+        """Provide explanations for a batch of bids, checking each rule over whole columns"""
+        n_bids = len(bids_df)
+        no_values = pd.Series(None, index=bids_df.index, dtype=object)
         
-        # Check bid amount patterns
-        if bid_data.get('bid_amount', 0) <= 0:
-            explanations.append("Invalid bid amount (zero or negative)")
+        bid_amount = bids_df.get('bid_amount', no_values).fillna(0).to_numpy(dtype=float)
+        proposal_length = bids_df.get('proposal', no_values).str.len().fillna(0).to_numpy()
+        company_name_length = bids_df.get('company_name', no_values).str.len().fillna(0).to_numpy()
         
-        # Check proposal length
-        proposal_length = len(bid_data.get('proposal', ''))
-        if proposal_length < 50:
-            explanations.append("Very short proposal (less than 50 characters)")
-        elif proposal_length > 5000:
-            explanations.append("Unusually long proposal (over 5000 characters)")
+        # Missing or unparseable times give NaN hours, which fail both comparisons
+        hour = pd.to_datetime(bids_df.get('submitted_at', no_values), errors='coerce').dt.hour.to_numpy(dtype=float)
         
-        # Check company name
-        company_name = bid_data.get('company_name', '')
-        if len(company_name) < 3:
-            explanations.append("Suspicious company name (too short)")
+        checks = [
+            (bid_amount <= 0, "Invalid bid amount (zero or negative)"),
+            (proposal_length < 50, "Very short proposal (less than 50 characters)"),
+            (proposal_length > 5000, "Unusually long proposal (over 5000 characters)"),
+            (company_name_length < 3, "Suspicious company name (too short)"),
+            ((hour < 6) | (hour > 22), "Unusual submission time (outside business hours)"),
+        ]
         
-        # Check submission timing
-        try:
-            if 'submitted_at' in bid_data:
-                submit_time = pd.to_datetime(bid_data['submitted_at'])
-                if submit_time.hour < 6 or submit_time.hour > 22:
-                    explanations.append("Unusual submission time (outside business hours)")
-        except:
-            pass
-        
-        if not explanations:
-            if anomaly_score < -0.1:
-                explanations.append("Pattern deviates significantly from normal bidding behavior")
+        explanations = [[] for _ in range(n_bids)]
+        for flagged, reason in checks:
+            for i in np.flatnonzero(flagged):
+                explanations[i].append(reason)
+        
+        # Bids that break no rule are explained by how far their score deviates
+        unexplained = ~np.logical_or.reduce([flagged for flagged, _ in checks])
+        significant = np.asarray(anomaly_scores, dtype=float) < -0.1
+        for i in np.flatnonzero(unexplained):
+            if significant[i]:
+                explanations[i].append("Pattern deviates significantly from normal bidding behavior")
             else:
-                explanations.append("Mild deviation from typical bid patterns")
+                explanations[i].append("Mild deviation from typical bid patterns")
         
         return explanations
     
     def save_model(self):
         """Save the trained model"""
         try:
-            joblib.dump(self.isolation_forest, os.path.join(self.model_path, 'isolation_forest.pkl'))
-            joblib.dump(self.scaler, os.path.join(self.model_path, 'scaler.pkl'))
-            joblib.dump(self.text_vectorizer, os.path.join(self.model_path, 'text_vectorizer.pkl'))
+            # Forest, scaler and training size go in one compressed file; the hashing vectorizer has no state
+            joblib.dump(
+                (self.isolation_forest, self.scaler, self.last_trained_rows),
+                os.path.join(self.model_path, MODEL_BUNDLE),
+                compress=3
+            )
+            
+            # Remove per-object files left by older models so they can't shadow this one
+            for filename in LEGACY_MODEL_FILES:
+                try:
+                    os.remove(os.path.join(self.model_path, filename))
+                except FileNotFoundError:
+                    pass
         except Exception as e:
             print(f"Error saving model: {e}")
     
     def load_model(self):
         """Load existing trained model"""
         try:
+            bundle_path = os.path.join(self.model_path, MODEL_BUNDLE)
+            if os.path.exists(bundle_path):
+                self.isolation_forest, self.scaler, self.last_trained_rows = joblib.load(bundle_path)
+                self._cache_scaling()
+                self.is_trained = True
+                return True
+            
             if all(os.path.exists(os.path.join(self.model_path, f)) for f in 
-                   ['isolation_forest.pkl', 'scaler.pkl', 'text_vectorizer.pkl']):
+                   ['isolation_forest.pkl', 'scaler.pkl']):
                 
                 self.isolation_forest = joblib.load(os.path.join(self.model_path, 'isolation_forest.pkl'))
                 self.scaler = joblib.load(os.path.join(self.model_path, 'scaler.pkl'))
-                self.text_vectorizer = joblib.load(os.path.join(self.model_path, 'text_vectorizer.pkl'))
+                self._cache_scaling()
+                
+                # Models trained before the switch to hashing need their fitted TF-IDF vocabulary
+                legacy_vectorizer_path = os.path.join(self.model_path, 'text_vectorizer.pkl')
+                if os.path.exists(legacy_vectorizer_path):
+                    self.text_vectorizer = joblib.load(legacy_vectorizer_path)
                 self.is_trained = True
                 return True
         except Exception as e:
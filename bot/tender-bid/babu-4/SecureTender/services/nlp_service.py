@@ -196,7 +196,7 @@ class NLPService:
         
         return {
             'word_count': len(words),
-            'sentence_count': len([s for s in sentences if s.strip()]),
+            'sentence_count': sum(1 for s in sentences if s.strip()),
             'character_count': len(text),
             'avg_word_length': sum(len(word) for word in words) / len(words) if words else 0,
             'avg_sentence_length': len(words) / len(sentences) if sentences else 0
@@ -154,10 +154,12 @@ class FileHandler:
     def get_file_info(self, file_path):
         """Get information about a saved file"""
         try:
-            if not os.path.exists(file_path):
+            # A single stat() both checks existence and gives size and times
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
                 return None
             
-            stat = os.stat(file_path)
             file_extension = os.path.splitext(file_path)[1].lower()
             
             return {
@@ -176,11 +178,10 @@ class FileHandler:
     def delete_file(self, file_path):
         """Delete a file"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True, "File deleted successfully"
-            else:
-                return False, "File not found"
+            os.remove(file_path)
+            return True, "File deleted successfully"
+        except FileNotFoundError:
+            return False, "File not found"
         except Exception as e:
             return False, f"Error deleting file: {str(e)}"
     
@@ -1,110 +1,251 @@
-import random
-import pandas as pd
+import collections
+import contextlib
+import itertools
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from database.db_manager import DatabaseManager
 from datetime import datetime, timedelta
 
+# A {field} placeholder; splitting on it keeps the field names between the literal pieces
+_TEMPLATE_FIELD_RE = re.compile(r"\{(\w+)\}")
+
+# Characters dropped from a lowercased company name to form its email slug, removed in one pass
+_SLUG_RE = re.compile(r"[ &]")
+
+def compile_template(template):
+    """Split a str.format template into (literal pieces, field names) so filling it is a plain join"""
+    parts = _TEMPLATE_FIELD_RE.split(template)
+    return parts[0::2], parts[1::2]
+
+# Sample company names
+_COMPANIES = (
+    "TechSolutions Corp", "InnovateIT Ltd", "SecureCloud Systems",
+    "DataDrive Technologies", "CyberSafe Solutions", "CloudFirst Inc",
+    "SmartTech Partners", "DigitalEdge Corp", "NextGen Systems",
+    "TechFlow Solutions", "InfoSec Dynamics", "CloudCore Technologies"
+)
+
+# Sample email domains
+_EMAIL_DOMAINS = ("tech.com", "solutions.net", "corp.io", "systems.org", "inc.com")
+
+# Sample proposal templates
+_PROPOSAL_TEMPLATES = (
+    "We propose a comprehensive solution with {years} years of experience in {domain}. Our approach includes {feature1}, {feature2}, and {feature3} with guaranteed delivery within timeline.",
+    "Our company offers cutting-edge {technology} solutions with expertise in {domain}. We provide {feature1}, {feature2}, and 24/7 support for optimal performance.",
+    "We specialize in {domain} with proven track record of {years} years. Our solution features {technology}, {feature1}, and comprehensive {feature2} implementation.",
+    "Professional {technology} implementation with focus on {domain}. Our team delivers {feature1}, advanced {feature2}, and ongoing maintenance support.",
+    "Enterprise-grade {technology} solution for {domain} requirements. We offer {feature1}, robust {feature2}, and scalable architecture design."
+)
+
+# Sample parameters for proposals
+_TECHNOLOGIES = ("cloud computing", "AI integration", "blockchain technology", "IoT systems", "machine learning")
+_DOMAINS = ("cybersecurity", "data analytics", "infrastructure management", "digital transformation", "automation")
+_FEATURES = ("real-time monitoring", "advanced encryption", "automated deployment", "performance optimization", "compliance management")
+
+# Bid amount ranges as fractions of the tender's estimated value, by kind of bid
+_MULTIPLIER_RANGES = np.array([
+    [0.8, 1.2],  # Normal: 80-120% of estimated value
+    [0.3, 0.6],  # Every 7th bid is low: 30-60% of estimated value
+    [1.5, 2.0],  # Every other 5th bid is high: 150-200% of estimated value
+])
+
+# Email local parts depend only on the company and templates never change, so derive both once
+_COMPANY_SLUGS = tuple(_SLUG_RE.sub('', company.lower()) for company in _COMPANIES)
+_COMPILED_TEMPLATES = tuple(compile_template(template) for template in _PROPOSAL_TEMPLATES)
+
+# Rows generated at a time by generate_test_bids_bulk
+BULK_CHUNK_SIZE = 50_000
+# Chunks each worker process may have built or queued ahead of the inserts
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+def tender_arrays(tenders_df):
+    """Get tender ids and estimated values as arrays, with 100000.0 standing in for a missing value"""
+    tender_ids = tenders_df['id'].to_numpy(dtype=np.int64)
+    tender_values = tenders_df['estimated_value'].fillna(100000.0).to_numpy(dtype=np.float64)
+    return tender_ids, tender_values
+
+def _generate_chunk(tender_ids, tender_values, num_bids, first_index=0, seed=None, unique_tenders=False):
+    """Build bid rows from tender id and value arrays and a seed; module-level so worker processes can run it"""
+    # seed may be anything default_rng accepts, including a Generator to continue
+    rng = np.random.default_rng(seed)
+    
+    # Pick every bid's tender up front as row positions instead of sampling a DataFrame per bid
+    if unique_tenders and num_bids <= len(tender_ids):
+        # Sample positions without replacement in one call rather than redrawing collisions;
+        # with more bids than tenders some must share, so fall back to independent picks
+        picks = rng.choice(len(tender_ids), size=num_bids, replace=False, shuffle=False)
+    else:
+        picks = rng.integers(0, len(tender_ids), num_bids)
+    
+    # Draw every other random choice for all bids at once, one array per field
+    company_ix = rng.integers(0, len(_COMPANIES), num_bids)
+    email_domain_ix = rng.integers(0, len(_EMAIL_DOMAINS), num_bids)
+    template_ix = rng.integers(0, len(_PROPOSAL_TEMPLATES), num_bids)
+    technology_ix = rng.integers(0, len(_TECHNOLOGIES), num_bids)
+    domain_ix = rng.integers(0, len(_DOMAINS), num_bids)
+    feature_ix = rng.integers(0, len(_FEATURES), (3, num_bids))
+    years = rng.integers(3, 21, num_bids)
+    
+    # Generate bid amounts with some variation: some bids are suspiciously low (potential red flags),
+    # some very high, the rest normal competitive bids
+    bid_index = np.arange(first_index, first_index + num_bids)
+    low_mask = bid_index % 7 == 0
+    high_mask = (bid_index % 5 == 0) & ~low_mask
+    # Each bid's kind picks its range by index, so one uniform draw covers every bid
+    ranges = _MULTIPLIER_RANGES[low_mask + 2 * high_mask]
+    multipliers = rng.uniform(ranges[:, 0], ranges[:, 1])
+    base_amounts = tender_values[picks]
+    bid_amounts = np.where(base_amounts != 0, base_amounts, 100000.0) * multipliers
+    
+    # Plain lists index much faster than NumPy arrays inside the per-bid loop
+    bid_tender_ids = tender_ids[picks].tolist()
+    bid_amounts = bid_amounts.tolist()
+    company_ix, email_domain_ix, template_ix, technology_ix, domain_ix, feature_ix, years = (
+        draws.tolist() for draws in (company_ix, email_domain_ix, template_ix, technology_ix, domain_ix, feature_ix, years)
+    )
+    
+    rows = []
+    
+    for i in range(num_bids):
+        # Generate company details
+        company_name = _COMPANIES[company_ix[i]]
+        contact_email = f"contact@{_COMPANY_SLUGS[company_ix[i]]}.{_EMAIL_DOMAINS[email_domain_ix[i]]}"
+        
+        # Generate proposal
+        literals, names = _COMPILED_TEMPLATES[template_ix[i]]
+        values = {
+            'years': str(years[i]),
+            'technology': _TECHNOLOGIES[technology_ix[i]],
+            'domain': _DOMAINS[domain_ix[i]],
+            'feature1': _FEATURES[feature_ix[0][i]],
+            'feature2': _FEATURES[feature_ix[1][i]],
+            'feature3': _FEATURES[feature_ix[2][i]]
+        }
+        pieces = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            pieces += (values[name], literal)
+        proposal = "".join(pieces)
+        
+        rows.append((bid_tender_ids[i], company_name, contact_email, bid_amounts[i], proposal))
+    
+    return rows
+
+def _generate_chunks_in_parallel(executor, chunk_args, in_flight):
+    """Submit the first in_flight chunks now; return an iterator of every chunk's rows, in order"""
+    chunk_args = iter(chunk_args)
+    pending = collections.deque(
+        executor.submit(_generate_chunk, *args) for args in itertools.islice(chunk_args, in_flight)
+    )
+    
+    def results():
+        # Submit one chunk per chunk taken, so finished rows wait in memory only briefly while the caller inserts
+        while pending:
+            rows = pending.popleft().result()
+            for args in itertools.islice(chunk_args, 1):
+                pending.append(executor.submit(_generate_chunk, *args))
+            yield rows
+    
+    return results()
+
 class TestDataGenerator:
     def __init__(self):
+        # One manager for the generator's lifetime, so its shared connection is reused across calls
         self.db = DatabaseManager()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Release the database connection held by this generator"""
+        self.db.close()
         
-    def generate_test_bids(self, num_bids=10):
-        """Generate test bids for AI model training"""
-        
-        # Sample company names
-        companies = [
-            "TechSolutions Corp", "InnovateIT Ltd", "SecureCloud Systems", 
-            "DataDrive Technologies", "CyberSafe Solutions", "CloudFirst Inc",
-            "SmartTech Partners", "DigitalEdge Corp", "NextGen Systems",
-            "TechFlow Solutions", "InfoSec Dynamics", "CloudCore Technologies"
-        ]
-        
-        # Sample email domains
-        email_domains = ["tech.com", "solutions.net", "corp.io", "systems.org", "inc.com"]
-        
-        # Sample proposal templates
-        proposal_templates = [
-            "We propose a comprehensive solution with {years} years of experience in {domain}. Our approach includes {feature1}, {feature2}, and {feature3} with guaranteed delivery within timeline.",
-            "Our company offers cutting-edge {technology} solutions with expertise in {domain}. We provide {feature1}, {feature2}, and 24/7 support for optimal performance.",
-            "We specialize in {domain} with proven track record of {years} years. Our solution features {technology}, {feature1}, and comprehensive {feature2} implementation.",
-            "Professional {technology} implementation with focus on {domain}. Our team delivers {feature1}, advanced {feature2}, and ongoing maintenance support.",
-            "Enterprise-grade {technology} solution for {domain} requirements. We offer {feature1}, robust {feature2}, and scalable architecture design."
-        ]
-        
-        # Sample parameters for proposals
-        technologies = ["cloud computing", "AI integration", "blockchain technology", "IoT systems", "machine learning"]
-        domains = ["cybersecurity", "data analytics", "infrastructure management", "digital transformation", "automation"]
-        features = ["real-time monitoring", "advanced encryption", "automated deployment", "performance optimization", "compliance management"]
+    def generate_test_bids(self, num_bids=10, verbose=False, unique_tenders=False):
+        """Generate test bids for AI model training; unique_tenders puts each bid on a different tender"""
         
         # Get available tenders
         tenders_df = self.db.get_tenders()
         if tenders_df.empty:
             print("No tenders available. Please create tenders first.")
             return []
-            
-        created_bids = []
         
-        for i in range(num_bids):
-            # Select random tender
-            tender = tenders_df.sample(1).iloc[0]  # Get random tender row
-            tender_id = int(tender['id'])  # Ensure integer type
-            tender_value = float(tender['estimated_value']) if 'estimated_value' in tender and pd.notna(tender['estimated_value']) else 100000.0
-            
-            # Generate company details
-            company_name = random.choice(companies)
-            email_domain = random.choice(email_domains)
-            contact_email = f"contact@{company_name.lower().replace(' ', '').replace('&', '')}.{email_domain}"
-            
-            # Generate bid amount with some variation
-            base_amount = float(tender_value) if tender_value else 100000
-            # Add randomness: some bids are suspiciously low (potential red flags)
-            if i % 7 == 0:  # Make some bids suspiciously low
-                bid_amount = base_amount * random.uniform(0.3, 0.6)  # 30-60% of estimated value
-            elif i % 5 == 0:  # Some bids are very high
-                bid_amount = base_amount * random.uniform(1.5, 2.0)  # 150-200% of estimated value
-            else:  # Normal competitive bids
-                bid_amount = base_amount * random.uniform(0.8, 1.2)  # 80-120% of estimated value
-                
-            # Generate proposal
-            template = random.choice(proposal_templates)
-            proposal = template.format(
-                years=random.randint(3, 20),
-                technology=random.choice(technologies),
-                domain=random.choice(domains),
-                feature1=random.choice(features),
-                feature2=random.choice(features),
-                feature3=random.choice(features)
-            )
+        rows = self.generate_bid_rows(tenders_df, num_bids, unique_tenders=unique_tenders)
+        
+        try:
+            # One executemany and one commit for the whole batch instead of one per bid
+            bid_ids = self.db.insert_bids_bulk(rows)
+        except Exception as e:
+            print(f"❌ Error creating test bids: {str(e)}")
+            return []
+        
+        created_bids = []
+        log = []
+        for bid_id, (tender_id, company_name, _, bid_amount, _) in zip(bid_ids, rows):
+            created_bids.append({
+                'bid_id': bid_id,
+                'company_name': company_name,
+                'bid_amount': bid_amount,
+                'tender_id': tender_id
+            })
             
-            try:
-                # Insert bid using the fixed database method
-                bid_id = self.db.insert_bid(
-                    tender_id=tender_id,
-                    company_name=company_name,
-                    contact_email=contact_email,
-                    bid_amount=bid_amount,
-                    proposal=proposal
-                )
-                
-                created_bids.append({
-                    'bid_id': bid_id,
-                    'company_name': company_name,
-                    'bid_amount': bid_amount,
-                    'tender_id': tender_id
-                })
-                
-                print(f"✅ Created bid {bid_id}: {company_name} - ${bid_amount:,.2f}")
-                
-            except Exception as e:
-                print(f"❌ Error creating bid for {company_name}: {str(e)}")
+            if verbose:
+                log.append(f"✅ Created bid {bid_id}: {company_name} - ${bid_amount:,.2f}\n")
+        
+        # One write for the whole report instead of a print per bid
+        if log:
+            sys.stdout.write("".join(log))
                 
         return created_bids
+    
+    def generate_bid_rows(self, tenders_df, num_bids, first_index=0, unique_tenders=False, rng=None):
+        """Build (tender_id, company_name, contact_email, bid_amount, proposal) rows for num_bids test bids"""
+        tender_ids, tender_values = tender_arrays(tenders_df)
+        return _generate_chunk(tender_ids, tender_values, num_bids, first_index, rng, unique_tenders)
+    
+    def generate_test_bids_bulk(self, num_bids, chunk_size=BULK_CHUNK_SIZE, seed=None):
+        """Generate a large number of test bids a chunk at a time; returns how many were created"""
+        tenders_df = self.db.get_tenders()
+        if tenders_df.empty:
+            print("No tenders available. Please create tenders first.")
+            return 0
+        
+        # Continuing bid positions give the same mix of bids as a single batch, and each chunk gets its own
+        # seed spawned from one root, so the result is reproducible whichever process builds a chunk
+        tender_ids, tender_values = tender_arrays(tenders_df)
+        starts = range(0, num_bids, chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        chunk_args = [
+            (tender_ids, tender_values, min(chunk_size, num_bids - start), start, chunk_seed)
+            for start, chunk_seed in zip(starts, seeds)
+        ]
+        
+        workers = os.cpu_count() or 1
+        with contextlib.ExitStack() as stack:
+            # Row building is pure Python, so spread chunks over processes while this one inserts;
+            # only a few chunks are ever held in memory, and never a result dict per bid
+            if len(chunk_args) > 1 and workers > 1:
+                # The pool forks its workers on the first submissions, which must happen before
+                # insert_bids_bulk takes the SQLite write lock
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                chunks = _generate_chunks_in_parallel(executor, chunk_args, CHUNKS_IN_FLIGHT_PER_WORKER * workers)
+            else:
+                chunks = (_generate_chunk(*args) for args in chunk_args)
+            rows = itertools.chain.from_iterable(chunks)
+            
+            # All chunks stream into one transaction, so when the load outweighs the existing bids
+            # their indexes are dropped and rebuilt once rather than updated row by row
+            return len(self.db.insert_bids_bulk(rows, rebuild_indexes=num_bids >= self.db.count('bids')))
 
 def main():
     """Main function to generate test data"""
-    generator = TestDataGenerator()
-    
     print("🚀 Generating test bids for AI model training...")
-    bids = generator.generate_test_bids(8)  # Generate 8 more bids (we have 4, need 10+ total)
+    with TestDataGenerator() as generator:
+        bids = generator.generate_test_bids(8, verbose=True)  # Generate 8 more bids (we have 4, need 10+ total)
     
     print(f"\n📊 Generated {len(bids)} test bids successfully!")
     print("The AI model should now have enough data for training.")